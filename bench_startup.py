@@ -0,0 +1,121 @@
+"""
+Startup-time benchmark for both containers.
+
+Imports each service module in a fresh interpreter, then reports how long the
+import and app initialization take and which imported packages cost the most.
+
+Usage:
+    python bench_startup.py [--runs N] [--top N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (label, directory, module, init code run after import, readiness code)
+TARGETS = [
+    (
+        "web-app",
+        "web-app",
+        "app",
+        "flask_app = module.create_app()",
+        "flask_app.config['db_ready'].wait(30)",
+    ),
+    (
+        "ml-client",
+        "machine-learning-client",
+        "voiceai",
+        "flask_app = module.app",
+        "flask_app.test_client().get('/health')",
+    ),
+]
+
+SNIPPET = """
+import importlib, json, time
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+imported = time.perf_counter()
+{init}
+initialized = time.perf_counter()
+{ready}
+ready = time.perf_counter()
+print(json.dumps({{
+    "import": imported - start,
+    "init": initialized - imported,
+    "ready": ready - initialized,
+}}))
+"""
+
+
+def run_once(directory, module, init, ready):
+    """
+    Time a single cold start of a module in a fresh interpreter
+    """
+    code = SNIPPET.format(module=module, init=init, ready=ready)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.join(ROOT, directory),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(directory, module, top):
+    """
+    Return the top-level imports with the highest cumulative import time
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.join(ROOT, directory),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    costs = []
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented two spaces per level and are listed
+        # before the package that imported them
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative) / 1000, name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                costs = children
+            children = []
+    return sorted(costs, reverse=True)[:top]
+
+
+def main():
+    """
+    Benchmark each container's startup and print a report
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per module")
+    parser.add_argument("--top", type=int, default=8, help="imports to list")
+    args = parser.parse_args()
+
+    for label, directory, module, init, ready in TARGETS:
+        samples = [run_once(directory, module, init, ready) for _ in range(args.runs)]
+        print(f"{label} ({module}.py), median of {args.runs} cold starts:")
+        for phase in ("import", "init", "ready"):
+            median = statistics.median(sample[phase] for sample in samples)
+            print(f"  {phase:<8}{median * 1000:9.1f} ms")
+        print("  heaviest imports (cumulative):")
+        for cost, name in heaviest_imports(directory, module, args.top):
+            print(f"    {cost:9.1f} ms  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Unit tests for the fair summarization scheduler."""
+
+import threading
+import time
+import pytest
+from scheduler import FairScheduler  # pylint: disable=import-error
+
+
+def run_jobs(scheduler, jobs):
+    """Queue jobs behind a blocker and return the order they were dispatched in."""
+    order = []
+    blocker_started = threading.Event()
+    release = threading.Event()
+
+    def blocker():
+        with scheduler.slot("blocker"):
+            blocker_started.set()
+            release.wait(5)
+
+    def job(user, cost):
+        with scheduler.slot(user, cost=cost):
+            order.append((user, cost))
+
+    threads = [threading.Thread(target=blocker)]
+    threads[0].start()
+    blocker_started.wait(5)
+    for user, cost in jobs:
+        thread = threading.Thread(target=job, args=(user, cost))
+        thread.start()
+        threads.append(thread)
+        # Make sure each job is queued before the next one arrives
+        while scheduler.stats()["queued"] < len(threads) - 1:
+            time.sleep(0.001)
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return order
+
+
+def test_short_job_overtakes_long_batch():
+    """Test a short job from another user is not stuck behind a long batch."""
+    scheduler = FairScheduler(max_concurrent=1)
+    order = run_jobs(
+        scheduler,
+        [("batch", 1000), ("batch", 1000), ("batch", 1000), ("casual", 10)],
+    )
+    assert order[0] == ("casual", 10)
+    assert order[1:] == [("batch", 1000)] * 3
+
+
+def test_users_are_interleaved():
+    """Test equal-sized jobs from two users alternate instead of running FIFO."""
+    scheduler = FairScheduler(max_concurrent=1)
+    order = run_jobs(
+        scheduler,
+        [("alice", 50), ("alice", 50), ("alice", 50), ("bob", 50), ("bob", 50)],
+    )
+    assert [user for user, _ in order] == ["alice", "bob", "alice", "bob", "alice"]
+
+
+def test_per_user_limit():
+    """Test a user never has more jobs running than the per-user cap."""
+    scheduler = FairScheduler(max_concurrent=4, per_user_limit=1)
+    peak = []
+    lock = threading.Lock()
+    running = [0]
+
+    def job():
+        with scheduler.slot("alice"):
+            with lock:
+                running[0] += 1
+                peak.append(running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=job) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert max(peak) == 1
+    assert scheduler.stats()["users"]["alice"]["dispatched"] == 4
+
+
+def test_queue_timeout():
+    """Test a job that cannot be scheduled in time raises TimeoutError."""
+    scheduler = FairScheduler(max_concurrent=1)
+    with scheduler.slot("alice"):
+        with pytest.raises(TimeoutError):
+            with scheduler.slot("bob", timeout=0.01):
+                pass
+    assert scheduler.stats()["queued"] == 0
+
+
+def test_stats_reports_queue_and_waits():
+    """Test stats exposes running and queued jobs per user."""
+    scheduler = FairScheduler(max_concurrent=1)
+
+    def waiter():
+        with scheduler.slot("bob"):
+            pass
+
+    with scheduler.slot("alice"):
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        while scheduler.stats()["queued"] < 1:
+            time.sleep(0.001)
+        stats = scheduler.stats()
+        assert stats["active"] == 1
+        assert stats["users"]["alice"]["running"] == 1
+        assert stats["users"]["bob"]["queued"] == 1
+    thread.join(5)
+
+    stats = scheduler.stats()
+    assert stats["users"]["bob"]["dispatched"] == 1
+    assert stats["users"]["bob"]["max_wait_ms"] > 0
+
+
+def test_long_job_not_starved_by_short_stream():
+    """Test a long job still runs while short jobs keep arriving one at a time."""
+    scheduler = FairScheduler(max_concurrent=1)
+    order = []
+    blocker_started = threading.Event()
+    release = threading.Event()
+
+    def blocker():
+        with scheduler.slot("blocker"):
+            blocker_started.set()
+            release.wait(5)
+
+    def long_job():
+        with scheduler.slot("batch", cost=1000, timeout=5):
+            order.append("batch")
+
+    def short_stream(user):
+        for _ in range(150):
+            with scheduler.slot(user, cost=10, timeout=5):
+                order.append(user)
+
+    threads = [threading.Thread(target=blocker)]
+    threads[0].start()
+    blocker_started.wait(5)
+    threads.append(threading.Thread(target=long_job))
+    threads[1].start()
+    while scheduler.stats()["queued"] < 1:
+        time.sleep(0.001)
+    for user in ("b", "c"):
+        threads.append(threading.Thread(target=short_stream, args=(user,)))
+        threads[-1].start()
+    while scheduler.stats()["queued"] < 3:
+        time.sleep(0.001)
+
+    release.set()
+    for thread in threads:
+        thread.join(10)
+    # Each user gets an equal share, so the long job (worth 100 short ones)
+    # runs after about 100 jobs from each short user, not after all 300
+    assert len(order) == 301
+    assert order.index("batch") < 250
+
+
+def test_retry_after_timeout_is_not_penalized():
+    """Test a job that timed out doesn't count against the user's retry."""
+    scheduler = FairScheduler(max_concurrent=1)
+    order = []
+    blocker_started = threading.Event()
+    release = threading.Event()
+
+    def blocker():
+        with scheduler.slot("blocker"):
+            blocker_started.set()
+            release.wait(5)
+
+    def job(user, cost):
+        with scheduler.slot(user, cost=cost, timeout=5):
+            order.append(user)
+
+    holder = threading.Thread(target=blocker)
+    holder.start()
+    blocker_started.wait(5)
+
+    with pytest.raises(TimeoutError):
+        with scheduler.slot("alice", cost=5000, timeout=0.01):
+            pass
+
+    threads = [
+        threading.Thread(target=job, args=("bob", 2000)),
+        threading.Thread(target=job, args=("alice", 10)),
+    ]
+    for count, thread in enumerate(threads, start=1):
+        thread.start()
+        while scheduler.stats()["queued"] < count:
+            time.sleep(0.001)
+
+    release.set()
+    for thread in [holder] + threads:
+        thread.join(5)
+    assert order == ["alice", "bob"]
@@ -75,3 +75,36 @@ def test_run_prompt_returns_string(mock_gpt_call):
     mock_gpt_call.return_value = "This is a test."
     result = asyncio.run(voiceai.run_prompt("hello"))
     assert isinstance(result, str)
+
+
+def test_health_route():
+    """Test the readiness probe responds without touching OpenAI."""
+    client = voiceai.app.test_client()
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ready"}
+
+
+@patch("voiceai.run_prompt", new_callable=AsyncMock)
+def test_summarize_route_schedules_per_user(mock_run_prompt):
+    """Test /summarize runs the job under the caller's identity."""
+    mock_run_prompt.return_value = "Scheduled summary"
+    client = voiceai.app.test_client()
+    response = client.post(
+        "/summarize", json={"transcript": "a short talk", "user": "alice"}
+    )
+    assert response.status_code == 200
+    assert response.get_json() == {"summary": "Scheduled summary"}
+
+    stats = client.get("/queue").get_json()
+    assert stats["users"]["alice"]["dispatched"] >= 1
+    assert stats["users"]["alice"]["running"] == 0
+
+
+@patch("voiceai.scheduler.slot", side_effect=TimeoutError)
+def test_summarize_route_queue_timeout(_mock_slot):
+    """Test /summarize returns 503 when the job waits too long in the queue."""
+    client = voiceai.app.test_client()
+    response = client.post("/summarize", json={"transcript": "hi", "user": "bob"})
+    assert response.status_code == 503
+    assert "error" in response.get_json()
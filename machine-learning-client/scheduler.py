@@ -0,0 +1,124 @@
+"""Fair scheduling for summarization requests.
+
+Each caller gets a concurrency cap, and queued jobs are dispatched in weighted
+fair queuing order: every job is tagged with a virtual finish time that grows
+with its size, so short jobs and light users go ahead of long batch submissions.
+Virtual time advances to the finish tag of each dispatched job (self-clocked
+fair queuing), so a long job is eventually reached however many short jobs
+keep arriving.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+
+class FairScheduler:  # pylint: disable=too-many-instance-attributes
+    """
+    Grants execution slots to jobs in weighted fair queuing order
+    """
+
+    def __init__(self, max_concurrent=4, per_user_limit=1):
+        self.max_concurrent = max_concurrent
+        self.per_user_limit = per_user_limit
+        self._cond = threading.Condition()
+        self._queue = []
+        self._running = {}
+        self._last_finish = {}
+        self._virtual_time = 0.0
+        self._active = 0
+        self._seq = itertools.count()
+        self._waits = {}
+
+    def _next(self):
+        """Return the queued job with the earliest finish tag that may run now"""
+        if self._active >= self.max_concurrent:
+            return None
+        eligible = [
+            job
+            for job in self._queue
+            if self._running.get(job[2], 0) < self.per_user_limit
+        ]
+        return min(eligible, default=None)
+
+    @contextmanager
+    def slot(self, user, cost=1, weight=1.0, timeout=None):
+        """
+        Block until the job may run, then hold its slot for the with-block.
+        Raises TimeoutError if the job is still queued after timeout seconds.
+        """
+        enqueued = time.monotonic()
+        with self._cond:
+            start = max(self._virtual_time, self._last_finish.get(user, 0.0))
+            finish = start + max(cost, 1) / weight
+            self._last_finish[user] = finish
+            job = (finish, next(self._seq), user)
+            self._queue.append(job)
+
+            if not self._cond.wait_for(lambda: self._next() is job, timeout):
+                self._queue.remove(job)
+                self._forget_unserved(user)
+                self._cond.notify_all()
+                raise TimeoutError(f"Job for {user} timed out in the queue")
+
+            self._queue.remove(job)
+            self._running[user] = self._running.get(user, 0) + 1
+            self._active += 1
+            self._virtual_time = max(self._virtual_time, finish)
+            self._record_wait(user, time.monotonic() - enqueued)
+            # Another slot may still be free for a different user
+            self._cond.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running[user] -= 1
+                self._active -= 1
+                self._prune(user)
+                self._cond.notify_all()
+
+    def _record_wait(self, user, waited):
+        """Accumulate queue wait time for a user"""
+        count, total, longest = self._waits.get(user, (0, 0.0, 0.0))
+        self._waits[user] = (count + 1, total + waited, max(longest, waited))
+
+    def _forget_unserved(self, user):
+        """Roll a user's finish tag back to the work still queued for them"""
+        queued = [job[0] for job in self._queue if job[2] == user]
+        if queued:
+            self._last_finish[user] = max(queued)
+        else:
+            # Dispatched jobs already moved virtual time past their finish tags
+            self._last_finish.pop(user, None)
+
+    def _prune(self, user):
+        """Forget the finish tag of a user with no queued or running jobs"""
+        if self._running[user] == 0:
+            del self._running[user]
+            if not any(job[2] == user for job in self._queue):
+                self._last_finish.pop(user, None)
+
+    def stats(self):
+        """
+        Return queue depth, running jobs and wait times for each user
+        """
+        with self._cond:
+            users = set(self._waits) | set(self._running)
+            users |= {job[2] for job in self._queue}
+            report = {}
+            for user in sorted(users):
+                count, total, longest = self._waits.get(user, (0, 0.0, 0.0))
+                report[user] = {
+                    "queued": sum(1 for job in self._queue if job[2] == user),
+                    "running": self._running.get(user, 0),
+                    "dispatched": count,
+                    "avg_wait_ms": round(total / count * 1000, 1) if count else 0.0,
+                    "max_wait_ms": round(longest * 1000, 1),
+                }
+            return {
+                "active": self._active,
+                "queued": len(self._queue),
+                "users": report,
+            }
@@ -6,22 +6,31 @@ and stores the result in a MongoDB database.
 
 import os
 import asyncio
-import openai
 import aiohttp
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
+from scheduler import FairScheduler  # pylint: disable=import-error
 
 app = Flask(__name__)
 
 load_dotenv()
 
 api_key = os.getenv("api_key")  # Make sure this is set in .env
-openai.api_key = api_key
+
+# Queue wait plus the GPT call must fit in the web app's 60 second timeout
+QUEUE_TIMEOUT = 15
+GPT_TIMEOUT = 40
+
+scheduler = FairScheduler(
+    max_concurrent=int(os.getenv("SUMMARIZE_CONCURRENCY", "4")),
+    per_user_limit=int(os.getenv("SUMMARIZE_PER_USER", "1")),
+)
 
 
 async def gpt_call(text, prompt):
     """Sends a prompt to the OpenAI API with the given text and returns the generated response."""
-    async with aiohttp.ClientSession() as session:
+    timeout = aiohttp.ClientTimeout(total=GPT_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
         async with session.post(
             "https://api.openai.com/v1/chat/completions",
             headers={
@@ -51,16 +60,41 @@ async def run_prompt(transcription):
     return await gpt_call(transcription, context)
 
 
+@app.route("/health")
+def health():
+    """
+    Readiness probe for docker-compose
+    """
+    return jsonify({"status": "ready"})
+
+
 @app.route("/summarize", methods=["POST"])
 def summarize():
     """
     Summarize incoming transcripts
     """
     data = request.get_json()
-    transcript = data.get("transcript") if data else ""
-    summary = asyncio.run(run_prompt(transcript)) if data else ""
+    if not data:
+        return jsonify({"summary": ""})
+
+    transcript = data.get("transcript") or ""
+    user = data.get("user") or request.remote_addr
+    try:
+        # Job size is the transcript length, so short summaries go first
+        with scheduler.slot(user, cost=len(transcript.split()), timeout=QUEUE_TIMEOUT):
+            summary = asyncio.run(run_prompt(transcript))
+    except TimeoutError:
+        return jsonify({"error": "Summarization queue is busy, please retry."}), 503
     return jsonify({"summary": summary})
 
 
+@app.route("/queue")
+def queue():
+    """
+    Report summarization queue depth and wait times per user
+    """
+    return jsonify(scheduler.stats())
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001)
@@ -4,7 +4,9 @@ File that houses python backend (Flask)
 
 import os
 import datetime
+import threading
 import traceback
+from collections import OrderedDict
 import pymongo
 from bson.objectid import ObjectId
 from dotenv import load_dotenv
@@ -19,9 +21,19 @@ from flask_login import (
 from flask import Flask, render_template, request, redirect, url_for, jsonify, flash
 from werkzeug.security import generate_password_hash, check_password_hash
 from pymongo.server_api import ServerApi
-from pymongo.errors import ConnectionFailure, ConfigurationError
+from pymongo.errors import ConnectionFailure, ConfigurationError, PyMongoError
 import requests
 
+# Seconds a request will wait for the background MongoDB connection
+DB_READY_TIMEOUT = 10
+
+# Seconds to wait for the voiceai service, covering its queue wait and GPT call
+SUMMARIZE_TIMEOUT = 60
+
+# Users whose related-recordings index is kept in memory, least recently used
+# indexes are dropped and rebuilt from MongoDB when needed again
+RELATED_CACHE_SIZE = 100
+
 
 def connect_mongodb():
     """
@@ -52,6 +64,216 @@ def connect_mongodb():
     return db
 
 
+def create_indexes(db):
+    """
+    Create indexes the app relies on, logging rather than raising on failure
+    """
+    try:
+        # One stats document per user, looked up on every home page view
+        db.userStats.create_index("user", unique=True)
+    except PyMongoError as e:
+        print(" * MongoDB index creation error:", e)
+
+
+def init_mongodb(app, connect=connect_mongodb):
+    """
+    Connect to MongoDB in a background thread so the app can start serving
+    immediately, and flag readiness once the connection attempt finishes
+    """
+    app.config["db"] = None
+    app.config["db_ready"] = threading.Event()
+
+    def run():
+        try:
+            db = connect()
+            app.config["db"] = db
+            if db is not None:
+                create_indexes(db)
+        except ValueError as e:
+            print(" * MongoDB configuration error:", e)
+        finally:
+            app.config["db_ready"].set()
+
+    thread = threading.Thread(target=run, name="mongodb-init", daemon=True)
+    thread.start()
+    return thread
+
+
+def update_user_stats(db, username, recordings, words, seconds):
+    """
+    Atomically adjust the materialized stats document for a user
+    """
+    db.userStats.update_one(
+        {"user": username},
+        {
+            "$inc": {
+                "recordings": recordings,
+                "total_words": words,
+                "total_seconds": seconds,
+            },
+            "$set": {"updated": datetime.datetime.now(datetime.timezone.utc)},
+        },
+        upsert=True,
+    )
+
+
+def backfill_word_counts(db):
+    """
+    Store word_count on recordings saved before it was tracked, so every
+    stats path reads the same stored count
+    """
+    legacy = db.speechSummary.find(
+        {"word_count": {"$exists": False}}, {"transcript": 1}
+    )
+    count = 0
+    for doc in legacy:
+        db.speechSummary.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"word_count": len(doc.get("transcript", "").split())}},
+        )
+        count += 1
+    return count
+
+
+def reconcile_user_stats(db):
+    """
+    Rebuild every user's stats document from the speechSummary collection.
+    Stats changed by $inc while the pipeline runs are left for the next run,
+    since the counts read by the pipeline may not include that change.
+    """
+    backfill_word_counts(db)
+    pipeline = [
+        {
+            "$group": {
+                "_id": "$user",
+                "recordings": {"$sum": 1},
+                "total_words": {"$sum": {"$ifNull": ["$word_count", 0]}},
+                "total_seconds": {"$sum": {"$ifNull": ["$duration", 0]}},
+            }
+        }
+    ]
+    started = datetime.datetime.now(datetime.timezone.utc)
+    users = []
+    for row in db.speechSummary.aggregate(pipeline):
+        users.append(row["_id"])
+        counters = {
+            "recordings": row["recordings"],
+            "total_words": row["total_words"],
+            "total_seconds": row["total_seconds"],
+            "updated": started,
+        }
+        result = db.userStats.update_one(
+            {"user": row["_id"], "updated": {"$lt": started}}, {"$set": counters}
+        )
+        if result.matched_count == 0:
+            # Only create missing documents, never overwrite a newer $inc
+            db.userStats.update_one(
+                {"user": row["_id"]}, {"$setOnInsert": counters}, upsert=True
+            )
+
+    # Users whose recordings were all deleted no longer show up in the pipeline
+    db.userStats.update_many(
+        {"user": {"$nin": users}, "updated": {"$lt": started}},
+        {
+            "$set": {
+                "recordings": 0,
+                "total_words": 0,
+                "total_seconds": 0,
+                "updated": started,
+            }
+        },
+    )
+    return len(users)
+
+
+def recording_text(doc):
+    """
+    Text of a recording used to find related recordings
+    """
+    return f"{doc.get('title', '')} {doc.get('summary', '')}"
+
+
+def get_related_index(app, db, username):
+    """
+    Return the related-recordings index for a user, building it on first use
+    """
+    # Imported here so numpy doesn't slow down app startup
+    from related import (  # pylint: disable=import-error,import-outside-toplevel
+        RelatedIndex,
+    )
+
+    indexes = app.config["related"]
+    with app.config["related_lock"]:
+        user_lock = app.config["related_locks"].setdefault(username, threading.Lock())
+
+    # Build under a per-user lock so one large history doesn't block other users
+    with user_lock:
+        with app.config["related_lock"]:
+            if username in indexes:
+                indexes.move_to_end(username)
+                return indexes[username]
+
+        try:
+            index = RelatedIndex()
+            for doc in db.speechSummary.find(
+                {"user": username}, {"title": 1, "summary": 1}
+            ):
+                index.add(str(doc["_id"]), recording_text(doc))
+        except Exception:
+            with app.config["related_lock"]:
+                app.config["related_locks"].pop(username, None)
+            raise
+
+        with app.config["related_lock"]:
+            indexes[username] = index
+            while len(indexes) > RELATED_CACHE_SIZE:
+                evicted, _ = indexes.popitem(last=False)
+                app.config["related_locks"].pop(evicted, None)
+        return index
+
+
+def update_related_index(app, username, update):
+    """
+    Apply update to a user's cached index, waiting for any build in progress
+    so the change isn't lost
+    """
+    with app.config["related_lock"]:
+        user_lock = app.config["related_locks"].get(username)
+    if user_lock is None:
+        # No index yet, it will be built from MongoDB on first use
+        return
+    with user_lock:
+        with app.config["related_lock"]:
+            index = app.config["related"].get(username)
+        if index is not None:
+            update(index)
+
+
+def find_related(app, db, doc, k=5):
+    """
+    Look up titles of the k recordings most similar to doc
+    """
+    index = get_related_index(app, db, doc["user"])
+    matches = index.similar(doc["_id"], k)
+    if not matches:
+        return []
+    titles = {
+        str(related["_id"]): related.get("title")
+        for related in db.speechSummary.find(
+            {
+                "_id": {"$in": [ObjectId(doc_id) for doc_id, _ in matches]},
+                "user": doc["user"],
+            },
+            {"title": 1},
+        )
+    }
+    return [
+        {"_id": doc_id, "title": titles[doc_id], "score": score}
+        for doc_id, score in matches
+        if doc_id in titles
+    ]
+
+
 def render_home(app):
     """
     Render home screen
@@ -62,13 +284,18 @@ def render_home(app):
         query = {"user": current_user.username}
         # Sort by timestamp in descending order (newest first)
         docs = list(db.speechSummary.find(query).sort("timestamp", -1))
+        stats = db.userStats.find_one(query) or {}
 
         # Add this debug print
         for doc in docs:
             print(f"Home page document: {doc['_id']}, title: {doc.get('title')}")
 
-        return render_template("home.html", docs=docs, username=current_user.username)
-    return render_template("home.html", docs=[], username=current_user.username)
+        return render_template(
+            "home.html", docs=docs, stats=stats, username=current_user.username
+        )
+    return render_template(
+        "home.html", docs=[], stats={}, username=current_user.username
+    )
 
 
 def render_summary(post_id, app):
@@ -101,7 +328,13 @@ def render_summary(post_id, app):
                 print("No document found")
 
             if doc:
-                return render_template("summary.html", doc=doc)
+                try:
+                    related = find_related(app, db, doc)
+                except Exception as e:  # pylint: disable=broad-except
+                    # Related recordings are optional, still show the summary
+                    print(f"Error finding related recordings: {str(e)}")
+                    related = []
+                return render_template("summary.html", doc=doc, related=related)
             flash("Recording not found.", "error")
             return redirect(url_for("home"))
 
@@ -122,12 +355,30 @@ def render_delete(recording_id, app):
     if db is not None:
         try:
             # Convert the recording_id back to ObjectId
-            result = db.speechSummary.delete_one(
-                {"_id": ObjectId(recording_id), "user": current_user.username}
+            deleted = db.speechSummary.find_one_and_delete(
+                {"_id": ObjectId(recording_id), "user": current_user.username},
+                projection={"word_count": 1, "duration": 1, "transcript": 1},
             )
 
-            if result.deleted_count == 1:
+            if deleted is not None:
                 # Successfully deleted
+                try:
+                    update_related_index(
+                        app,
+                        current_user.username,
+                        lambda index: index.remove(recording_id),
+                    )
+                except Exception as e:  # pylint: disable=broad-except
+                    print(f"Error updating related recordings: {str(e)}")
+                update_user_stats(
+                    db,
+                    current_user.username,
+                    -1,
+                    -deleted.get(
+                        "word_count", len(deleted.get("transcript", "").split())
+                    ),
+                    -deleted.get("duration", 0),
+                )
                 flash("Recording deleted successfully.", "success")
             else:
                 # No matching recording found
@@ -149,6 +400,7 @@ def render_summarize(app):
     """
     title = request.form.get("title")
     transcript = request.form.get("transcript")
+    duration = max(request.form.get("duration", 0, type=int), 0)
 
     print(f"Transcript length: {len(transcript)} characters")
 
@@ -157,13 +409,22 @@ def render_summarize(app):
         print("Sending transcript to voiceai service...")
         response = requests.post(
             "http://ml-client:5001/summarize",
-            json={"transcript": transcript},
-            timeout=60,
+            json={"transcript": transcript, "user": current_user.username},
+            timeout=SUMMARIZE_TIMEOUT,
         )
 
         # Print response status for debugging
         print(f"Response status code: {response.status_code}")
 
+        if not response.ok:
+            # Don't save a recording without a summary; 503 means the queue is busy
+            print("ML service error:", response.text)
+            status = 503 if response.status_code == 503 else 502
+            return (
+                jsonify({"error": "Summarization service is unavailable, try again."}),
+                status,
+            )
+
         # Get response data
         try:
             result = response.json()
@@ -181,11 +442,29 @@ def render_summarize(app):
                 "summary": summary,
                 "timestamp": datetime.datetime.now(datetime.timezone.utc),
                 "user": current_user.username,
+                "word_count": len(transcript.split()),
+                "duration": duration,
             }
             # Insert the document and get the inserted ID
             inserted_id = db.speechSummary.insert_one(doc).inserted_id
-
             print(f"Recording saved to database with ID: {inserted_id}")
+
+            # The recording is saved, so bookkeeping errors must not fail the
+            # request and invite a retry that would store a duplicate
+            try:
+                update_related_index(
+                    app,
+                    current_user.username,
+                    lambda index: index.add(str(inserted_id), recording_text(doc)),
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"Error updating related recordings: {str(e)}")
+            try:
+                update_user_stats(
+                    db, current_user.username, 1, doc["word_count"], duration
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"Error updating user stats: {str(e)}")
         else:
             print("Warning: Database connection not available")
 
@@ -203,7 +482,7 @@ def render_summarize(app):
         return jsonify({"error": str(e)}), 500
 
 
-def create_app():
+def create_app():  # pylint: disable=too-many-locals
     """
     Create Flask App
     """
@@ -235,10 +514,46 @@ def create_app():
                 return User(user_id, user_data["username"])
         return None
 
-    db = connect_mongodb()
+    # Store db connection in app config once the background connect finishes
+    init_mongodb(app, connect_mongodb)
+
+    # Per-user related-recordings indexes, built lazily on first summary view
+    app.config["related"] = OrderedDict()
+    app.config["related_lock"] = threading.Lock()
+    app.config["related_locks"] = {}
+
+    @app.before_request
+    def wait_for_db():
+        """
+        Hold requests that need the database until the connection is ready
+        """
+        if request.endpoint in ("static", "health"):
+            return None
+        if not app.config["db_ready"].wait(DB_READY_TIMEOUT):
+            return "Service is starting up, please retry shortly.", 503
+        return None
 
-    # Store db connection in app config
-    app.config["db"] = db
+    @app.route("/health")
+    def health():
+        """
+        Readiness probe for docker-compose
+        """
+        if not app.config["db_ready"].is_set():
+            return jsonify({"status": "starting"}), 503
+        if app.config["db"] is None:
+            return jsonify({"status": "unavailable", "db": False}), 503
+        return jsonify({"status": "ready", "db": True})
+
+    @app.cli.command("reconcile-stats")
+    def reconcile_stats():
+        """
+        Recompute per-user stats from scratch, meant to run periodically
+        """
+        db = app.config["db"]
+        if db is None:
+            print("Warning: Database connection not available")
+            return
+        print(f"Reconciled stats for {reconcile_user_stats(db)} users")
 
     @app.route("/")
     @login_required
@@ -0,0 +1,153 @@
+"""
+Per-user similarity index for finding related recordings.
+
+Recordings are embedded locally with hashed TF-IDF: words are hashed into a
+fixed number of buckets, so no vocabulary has to be stored or trained. The
+log-scaled term frequencies are L2-normalized and kept as rows of one contiguous
+float32 matrix. IDF weights are applied to the query only, so inserts and
+deletes never rewrite stored rows and a top-k lookup is a single mat-vec.
+"""
+
+import re
+import threading
+import zlib
+import numpy as np
+
+DIM = 256
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its of on or so "
+    "that the this to was we were will with you".split()
+)
+
+
+def embed(text, dim=DIM):
+    """
+    Return the L2-normalized hashed term-frequency vector for text
+    """
+    buckets = [
+        zlib.crc32(token.encode()) % dim
+        for token in TOKEN_RE.findall(text.lower())
+        if token not in STOP_WORDS
+    ]
+    vector = np.log1p(np.bincount(buckets, minlength=dim).astype(np.float32))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class RelatedIndex:
+    """
+    Growable matrix of recording vectors supporting top-k cosine queries
+    """
+
+    def __init__(self, dim=DIM, capacity=64):
+        self.dim = dim
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._ids = []
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._rows
+
+    def add(self, doc_id, text):
+        """
+        Insert or replace the vector for a recording
+        """
+        self._insert(doc_id, embed(text, self.dim))
+
+    def _insert(self, doc_id, vector):
+        with self._lock:
+            if doc_id in self._rows:
+                self._delete(doc_id)
+            size = len(self._ids)
+            if size == len(self._vectors):
+                grown = np.zeros((size * 2, self.dim), dtype=np.float32)
+                grown[:size] = self._vectors
+                self._vectors = grown
+            self._vectors[size] = vector
+            self._df += vector > 0
+            self._rows[doc_id] = size
+            self._ids.append(doc_id)
+
+    def remove(self, doc_id):
+        """
+        Drop a recording from the index, ignoring unknown ids
+        """
+        with self._lock:
+            if doc_id in self._rows:
+                self._delete(doc_id)
+
+    def _delete(self, doc_id):
+        """Move the last row into the freed slot so the matrix stays contiguous"""
+        row = self._rows.pop(doc_id)
+        self._df -= self._vectors[row] > 0
+        last = len(self._ids) - 1
+        if row != last:
+            self._vectors[row] = self._vectors[last]
+            self._ids[row] = self._ids[last]
+            self._rows[self._ids[row]] = row
+        self._vectors[last] = 0
+        self._ids.pop()
+
+    def query(self, text, k=5, exclude=None):
+        """
+        Return up to k (doc_id, score) pairs most similar to text
+        """
+        return self._search(embed(text, self.dim), k, exclude)
+
+    def similar(self, doc_id, k=5):
+        """
+        Return up to k (doc_id, score) pairs most similar to an indexed recording
+        """
+        with self._lock:
+            if doc_id not in self._rows:
+                return []
+            vector = self._vectors[self._rows[doc_id]].copy()
+        return self._search(vector, k, doc_id)
+
+    def _search(self, vector, k, exclude):
+        with self._lock:
+            size = len(self._ids)
+            idf = np.log((1 + size) / (1 + self._df)) + 1
+            weighted = vector * idf
+            norm = np.linalg.norm(weighted)
+            if not size or not norm:
+                return []
+            scores = self._vectors[:size] @ (weighted / norm)
+            if exclude in self._rows:
+                scores[self._rows[exclude]] = -1.0
+            k = min(k, size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (self._ids[row], float(scores[row])) for row in top if scores[row] > 0
+            ]
+
+    def save(self, path):
+        """
+        Write the index to path.npy and path.ids so it can be memory-mapped later
+        """
+        with self._lock:
+            np.save(f"{path}.npy", self._vectors[: len(self._ids)])
+            with open(f"{path}.ids", "w", encoding="utf-8") as handle:
+                handle.write("\n".join(self._ids))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load an index written by save, memory-mapping the vectors by default
+        """
+        vectors = np.load(f"{path}.npy", mmap_mode="c" if mmap else None)
+        with open(f"{path}.ids", encoding="utf-8") as handle:
+            ids = handle.read().split("\n") if vectors.shape[0] else []
+        index = cls(dim=vectors.shape[1], capacity=max(len(ids), 1))
+        index._vectors = vectors if len(ids) else index._vectors
+        index._ids = ids
+        index._rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        index._df = (vectors > 0).sum(axis=0).astype(np.float32)
+        return index
@@ -1,11 +1,22 @@
 """program to test app.py file"""
+
 from unittest.mock import patch, MagicMock
 import datetime
+import threading
+import time
 import pytest
 from bson import ObjectId
 from werkzeug.security import generate_password_hash
 import pymongo
-from app import create_app, connect_mongodb  # pylint: disable=import-error
+from app import (  # pylint: disable=import-error
+    backfill_word_counts,
+    create_app,
+    connect_mongodb,
+    get_related_index,
+    init_mongodb,
+    update_related_index,
+    reconcile_user_stats,
+)
 
 
 @pytest.fixture(name="app")
@@ -64,6 +75,71 @@ def test_mongodb_connection_failure():
             assert db is None
 
 
+def test_init_mongodb_runs_in_background():
+    """Test the app is created before the MongoDB connection finishes."""
+    release = threading.Event()
+    mock_db = MagicMock()
+
+    def slow_connect():
+        release.wait(5)
+        return mock_db
+
+    with patch("app.connect_mongodb", side_effect=slow_connect):
+        app = create_app()
+        client = app.test_client()
+
+        response = client.get("/health")
+        assert response.status_code == 503
+        assert response.get_json() == {"status": "starting"}
+
+        release.set()
+        assert app.config["db_ready"].wait(5)
+
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ready", "db": True}
+    assert app.config["db"] is mock_db
+    mock_db.userStats.create_index.assert_called_once_with("user", unique=True)
+
+
+def test_init_mongodb_missing_config():
+    """Test a configuration error still marks the database as ready."""
+    app = MagicMock()
+    app.config = {}
+    connect = MagicMock(side_effect=ValueError("MONGO_URI not found"))
+
+    init_mongodb(app, connect).join(5)
+
+    assert app.config["db_ready"].is_set()
+    assert app.config["db"] is None
+
+
+def test_init_mongodb_index_failure_keeps_db():
+    """Test a failed index build does not discard a working connection."""
+    app = MagicMock()
+    app.config = {}
+    mock_db = MagicMock()
+    mock_db.userStats.create_index.side_effect = pymongo.errors.OperationFailure(
+        "not authorized"
+    )
+
+    init_mongodb(app, MagicMock(return_value=mock_db)).join(5)
+
+    assert app.config["db_ready"].is_set()
+    assert app.config["db"] is mock_db
+
+
+def test_health_reports_failed_connection():
+    """Test /health is unhealthy when the MongoDB connection failed."""
+    with patch("app.connect_mongodb", return_value=None):
+        app = create_app()
+        assert app.config["db_ready"].wait(5)
+
+    response = app.test_client().get("/health")
+    assert response.status_code == 503
+    assert response.get_json() == {"status": "unavailable", "db": False}
+
+
 def test_home_route_authorized(client, mock_db, app):
     """Test home route with authentication."""
     test_user_id = ObjectId()
@@ -98,6 +174,12 @@ def test_home_route_authorized(client, mock_db, app):
             "timestamp": datetime.datetime.utcnow(),
         }
     ]
+    mock_db.userStats.find_one.return_value = {
+        "user": "testuser",
+        "recordings": 7,
+        "total_words": 1234,
+        "total_seconds": 125,
+    }
 
     response = client.get("/")
     assert response.status_code == 200, "Home page access failed"
@@ -111,6 +193,10 @@ def test_home_route_authorized(client, mock_db, app):
     assert "Test Recording" in response_text, "Recording title not found in response"
     assert "Test summary" in response_text, "Summary not found in response"
 
+    mock_db.userStats.find_one.assert_called_once_with({"user": "testuser"})
+    assert "1234" in response_text, "Word count not found in stats panel"
+    assert "2m 5s" in response_text, "Recording time not found in stats panel"
+
 
 def test_login_route_get(client):
     """Test login page access."""
@@ -237,6 +323,155 @@ def test_summary_page_route(client, mock_db):
     assert "Test transcript" in html
 
 
+def test_summary_page_shows_related(client, mock_db):
+    """Test summary page lists similar recordings from the user's history."""
+    # Login
+    mock_db.users.find_one.return_value = {
+        "_id": ObjectId(),
+        "username": "testuser",
+        "password": generate_password_hash("testpass"),
+    }
+    client.post("/login", data={"username": "testuser", "password": "testpass"})
+
+    test_id, related_id, other_id = ObjectId(), ObjectId(), ObjectId()
+    mock_db.speechSummary.find_one.return_value = {
+        "_id": test_id,
+        "user": "testuser",
+        "title": "Physics lecture",
+        "summary": "Newton laws of motion and gravity",
+        "transcript": "Test transcript",
+        "timestamp": datetime.datetime.utcnow(),
+    }
+    mock_db.speechSummary.find.side_effect = [
+        # History used to build the index
+        [
+            {
+                "_id": test_id,
+                "title": "Physics lecture",
+                "summary": "Newton laws of motion and gravity",
+            },
+            {
+                "_id": related_id,
+                "title": "Gravity review",
+                "summary": "Gravity and the laws of motion",
+            },
+            {
+                "_id": other_id,
+                "title": "Grocery list",
+                "summary": "Buy apples and bread",
+            },
+        ],
+        # Titles of the matches
+        [{"_id": related_id, "title": "Gravity review"}],
+    ]
+
+    response = client.get(f"/summaryPage/{str(test_id)}")
+    html = response.data.decode("utf-8")
+    assert response.status_code == 200
+    assert "Related Recordings" in html
+    assert "Gravity review" in html
+    assert "Grocery list" not in html
+
+    title_query = mock_db.speechSummary.find.call_args[0][0]
+    assert title_query["_id"] == {"$in": [related_id]}
+
+
+def test_summary_page_survives_related_error(client, mock_db):
+    """Test a failing related lookup still renders the summary."""
+    mock_db.users.find_one.return_value = {
+        "_id": ObjectId(),
+        "username": "testuser",
+        "password": generate_password_hash("testpass"),
+    }
+    client.post("/login", data={"username": "testuser", "password": "testpass"})
+
+    test_id = ObjectId()
+    mock_db.speechSummary.find_one.return_value = {
+        "_id": test_id,
+        "user": "testuser",
+        "title": "Test Recording",
+        "summary": "Test summary",
+        "transcript": "Test transcript",
+        "timestamp": datetime.datetime.utcnow(),
+    }
+    mock_db.speechSummary.find.side_effect = pymongo.errors.OperationFailure("boom")
+
+    response = client.get(f"/summaryPage/{str(test_id)}")
+    html = response.data.decode("utf-8")
+    assert response.status_code == 200
+    assert "Test summary" in html
+    assert "Related Recordings" not in html
+
+
+def test_related_index_build_does_not_block_other_users(app):
+    """Test building one user's index doesn't hold up another user's."""
+    release = threading.Event()
+    alice_db = MagicMock()
+
+    def slow_history(*_args):
+        release.wait(5)
+        return []
+
+    alice_db.speechSummary.find.side_effect = slow_history
+    builder = threading.Thread(target=get_related_index, args=(app, alice_db, "alice"))
+    builder.start()
+    while "alice" not in app.config["related_locks"]:
+        time.sleep(0.001)
+
+    bob_db = MagicMock()
+    bob_db.speechSummary.find.return_value = []
+    assert len(get_related_index(app, bob_db, "bob")) == 0
+    assert builder.is_alive()
+
+    release.set()
+    builder.join(5)
+    assert "alice" in app.config["related"]
+
+
+def test_related_update_waits_for_build(app):
+    """Test a recording saved during an index build still ends up indexed."""
+    release = threading.Event()
+    db = MagicMock()
+
+    def slow_history(*_args):
+        release.wait(5)
+        return [{"_id": ObjectId(), "title": "Old", "summary": "old notes"}]
+
+    db.speechSummary.find.side_effect = slow_history
+    builder = threading.Thread(target=get_related_index, args=(app, db, "alice"))
+    builder.start()
+    while "alice" not in app.config["related_locks"]:
+        time.sleep(0.001)
+
+    new_id = str(ObjectId())
+    updater = threading.Thread(
+        target=update_related_index,
+        args=(app, "alice", lambda index: index.add(new_id, "new notes")),
+    )
+    updater.start()
+    release.set()
+    builder.join(5)
+    updater.join(5)
+
+    assert new_id in app.config["related"]["alice"]
+    assert len(app.config["related"]["alice"]) == 2
+
+
+def test_related_cache_evicts_least_recently_used(app):
+    """Test the per-user index cache is bounded and evicts locks with indexes."""
+    db = MagicMock()
+    db.speechSummary.find.return_value = []
+
+    with patch("app.RELATED_CACHE_SIZE", 2):
+        get_related_index(app, db, "alice")
+        get_related_index(app, db, "bob")
+        get_related_index(app, db, "alice")
+        get_related_index(app, db, "carol")
+
+    assert list(app.config["related"]) == ["alice", "carol"]
+    assert set(app.config["related_locks"]) == {"alice", "carol"}
+
+
 def test_delete_record_route(client, mock_db):
     """Test delete_record route"""
     # Login
@@ -249,6 +484,11 @@ def test_delete_record_route(client, mock_db):
 
     # Create a test record ID
     test_id = str(ObjectId())
+    mock_db.speechSummary.find_one_and_delete.return_value = {
+        "_id": ObjectId(test_id),
+        "word_count": 40,
+        "duration": 90,
+    }
 
     response = client.get(f"/deleteRecord/{test_id}")
 
@@ -257,6 +497,192 @@ def test_delete_record_route(client, mock_db):
     assert response.location.endswith("/")
 
     # Verify deletion was called with correct parameters
-    mock_db.speechSummary.delete_one.assert_called_once_with(
-        {"_id": ObjectId(test_id), "user": "testuser"}
+    mock_db.speechSummary.find_one_and_delete.assert_called_once()
+    call_args = mock_db.speechSummary.find_one_and_delete.call_args[0][0]
+    assert call_args == {"_id": ObjectId(test_id), "user": "testuser"}
+
+    # Verify the stats counters were decremented
+    stats_update = mock_db.userStats.update_one.call_args[0][1]
+    assert stats_update["$inc"] == {
+        "recordings": -1,
+        "total_words": -40,
+        "total_seconds": -90,
+    }
+
+
+def test_summarize_transcript_updates_stats(client, mock_db):
+    """Test summarize-transcript stores the recording and bumps user stats."""
+    # Login
+    mock_db.users.find_one.return_value = {
+        "_id": ObjectId(),
+        "username": "testuser",
+        "password": generate_password_hash("testpass"),
+    }
+    client.post("/login", data={"username": "testuser", "password": "testpass"})
+
+    mock_db.speechSummary.insert_one.return_value = MagicMock(inserted_id=ObjectId())
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"summary": "Short summary"}
+
+    with patch("app.requests.post", return_value=mock_response) as mock_post:
+        response = client.post(
+            "/summarize-transcript",
+            data={"title": "Talk", "transcript": "one two three", "duration": "12"},
+        )
+
+    assert response.status_code == 200
+    assert mock_post.call_args[1]["json"] == {
+        "transcript": "one two three",
+        "user": "testuser",
+    }
+    assert response.get_json()["summary"] == "Short summary"
+
+    stored = mock_db.speechSummary.insert_one.call_args[0][0]
+    assert stored["word_count"] == 3
+    assert stored["duration"] == 12
+
+    mock_db.userStats.update_one.assert_called_once()
+    stats_filter, stats_update = mock_db.userStats.update_one.call_args[0]
+    assert stats_filter == {"user": "testuser"}
+    assert stats_update["$inc"] == {
+        "recordings": 1,
+        "total_words": 3,
+        "total_seconds": 12,
+    }
+
+
+def test_summarize_transcript_service_busy(client, mock_db):
+    """Test a busy summarization service saves nothing and returns 503."""
+    mock_db.users.find_one.return_value = {
+        "_id": ObjectId(),
+        "username": "testuser",
+        "password": generate_password_hash("testpass"),
+    }
+    client.post("/login", data={"username": "testuser", "password": "testpass"})
+
+    mock_response = MagicMock(ok=False, status_code=503)
+    mock_response.json.return_value = {"error": "Summarization queue is busy"}
+
+    with patch("app.requests.post", return_value=mock_response):
+        response = client.post(
+            "/summarize-transcript",
+            data={"title": "Talk", "transcript": "one two", "duration": "5"},
+        )
+
+    assert response.status_code == 503
+    assert "error" in response.get_json()
+    mock_db.speechSummary.insert_one.assert_not_called()
+    mock_db.userStats.update_one.assert_not_called()
+
+
+def test_summarize_transcript_clamps_duration(client, mock_db):
+    """Test a negative duration from the client never decrements stats."""
+    mock_db.users.find_one.return_value = {
+        "_id": ObjectId(),
+        "username": "testuser",
+        "password": generate_password_hash("testpass"),
+    }
+    client.post("/login", data={"username": "testuser", "password": "testpass"})
+
+    mock_db.speechSummary.insert_one.return_value = MagicMock(inserted_id=ObjectId())
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"summary": "Short summary"}
+
+    with patch("app.requests.post", return_value=mock_response):
+        client.post(
+            "/summarize-transcript",
+            data={"title": "Talk", "transcript": "one two", "duration": "-30"},
+        )
+
+    assert mock_db.speechSummary.insert_one.call_args[0][0]["duration"] == 0
+    stats_update = mock_db.userStats.update_one.call_args[0][1]
+    assert stats_update["$inc"]["total_seconds"] == 0
+
+
+def test_summarize_transcript_stats_failure_still_succeeds(client, mock_db):
+    """Test a failed stats update doesn't fail a saved recording."""
+    mock_db.users.find_one.return_value = {
+        "_id": ObjectId(),
+        "username": "testuser",
+        "password": generate_password_hash("testpass"),
+    }
+    client.post("/login", data={"username": "testuser", "password": "testpass"})
+
+    inserted_id = ObjectId()
+    mock_db.speechSummary.insert_one.return_value = MagicMock(inserted_id=inserted_id)
+    mock_db.userStats.update_one.side_effect = pymongo.errors.OperationFailure("boom")
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"summary": "Short summary"}
+
+    with patch("app.requests.post", return_value=mock_response):
+        response = client.post(
+            "/summarize-transcript",
+            data={"title": "Talk", "transcript": "one two", "duration": "5"},
+        )
+
+    assert response.status_code == 200
+    assert response.get_json()["recording_id"] == str(inserted_id)
+
+
+def test_backfill_word_counts():
+    """Test legacy recordings get the same word count the app computes."""
+    mock_db = MagicMock()
+    legacy_id = ObjectId()
+    mock_db.speechSummary.find.return_value = [
+        {"_id": legacy_id, "transcript": "one\ttwo\nthree  four"}
+    ]
+
+    assert backfill_word_counts(mock_db) == 1
+
+    query = mock_db.speechSummary.find.call_args[0][0]
+    assert query == {"word_count": {"$exists": False}}
+    mock_db.speechSummary.update_one.assert_called_once_with(
+        {"_id": legacy_id}, {"$set": {"word_count": 4}}
     )
+
+
+def test_reconcile_user_stats():
+    """Test reconciliation rewrites stats from the aggregation pipeline."""
+    mock_db = MagicMock()
+    mock_db.speechSummary.aggregate.return_value = [
+        {"_id": "alice", "recordings": 2, "total_words": 50, "total_seconds": 30},
+        {"_id": "bob", "recordings": 1, "total_words": 10, "total_seconds": 5},
+    ]
+    mock_db.userStats.update_one.return_value = MagicMock(matched_count=1)
+
+    assert reconcile_user_stats(mock_db) == 2
+
+    # Legacy recordings are backfilled first, so the pipeline reads word_count
+    mock_db.speechSummary.find.assert_called_once()
+    group = mock_db.speechSummary.aggregate.call_args[0][0][0]["$group"]
+    assert group["total_words"]["$sum"]["$ifNull"][0] == "$word_count"
+
+    assert mock_db.userStats.update_one.call_count == 2
+    alice_filter, alice_update = mock_db.userStats.update_one.call_args_list[0][0]
+    assert alice_filter["user"] == "alice"
+    assert "$lt" in alice_filter["updated"]
+    assert alice_update["$set"]["recordings"] == 2
+    assert alice_update["$set"]["total_words"] == 50
+
+    # Users missing from the pipeline are zeroed out
+    reset_filter = mock_db.userStats.update_many.call_args[0][0]
+    assert reset_filter["user"] == {"$nin": ["alice", "bob"]}
+
+
+def test_reconcile_skips_stats_changed_during_run():
+    """Test reconciliation only inserts, never overwrites, newer stats."""
+    mock_db = MagicMock()
+    mock_db.speechSummary.aggregate.return_value = [
+        {"_id": "alice", "recordings": 2, "total_words": 50, "total_seconds": 30},
+    ]
+    mock_db.userStats.update_one.side_effect = [
+        MagicMock(matched_count=0),
+        MagicMock(matched_count=0),
+    ]
+
+    reconcile_user_stats(mock_db)
+
+    insert_filter, insert_update = mock_db.userStats.update_one.call_args[0]
+    assert insert_filter == {"user": "alice"}
+    assert insert_update["$setOnInsert"]["recordings"] == 2
+    assert mock_db.userStats.update_one.call_args[1] == {"upsert": True}
@@ -0,0 +1,72 @@
+"""Unit tests for the related-recordings index."""
+
+import numpy as np
+from related import RelatedIndex, embed  # pylint: disable=import-error
+
+
+def test_embed_is_normalized():
+    """Test embeddings are unit length, and empty text embeds to zeros."""
+    assert np.isclose(np.linalg.norm(embed("the quick brown fox")), 1.0)
+    assert not embed("").any()
+
+
+def test_similar_ranks_by_cosine():
+    """Test the closest recording is ranked first and the query is excluded."""
+    index = RelatedIndex()
+    index.add("physics", "newton laws of motion and gravity")
+    index.add("review", "gravity and the laws of motion")
+    index.add("groceries", "buy apples bread and milk")
+
+    matches = index.similar("physics", k=2)
+    assert matches[0][0] == "review"
+    assert "physics" not in [doc_id for doc_id, _ in matches]
+    assert index.similar("missing") == []
+
+
+def test_query_text():
+    """Test free-text queries find matching recordings."""
+    index = RelatedIndex()
+    index.add("a", "machine learning lecture on neural networks")
+    index.add("b", "weekend hiking trip plans")
+    assert index.query("neural networks", k=1)[0][0] == "a"
+
+
+def test_add_grows_and_remove_compacts():
+    """Test the matrix grows past its capacity and stays contiguous on remove."""
+    index = RelatedIndex(capacity=2)
+    for i in range(5):
+        index.add(f"doc{i}", f"topic{i} shared words")
+    assert len(index) == 5
+
+    index.remove("doc1")
+    index.remove("unknown")
+    assert len(index) == 4
+    assert "doc1" not in index
+    assert "doc4" in index
+    assert index.query("topic4", k=1)[0][0] == "doc4"
+
+
+def test_add_replaces_existing():
+    """Test re-adding an id updates it instead of duplicating it."""
+    index = RelatedIndex()
+    index.add("a", "cats and dogs")
+    index.add("a", "stock market report")
+    index.add("b", "quarterly stock report")
+    assert len(index) == 2
+    assert index.similar("b", k=1)[0][0] == "a"
+
+
+def test_save_and_load(tmp_path):
+    """Test an index round-trips through a memory-mapped file."""
+    index = RelatedIndex()
+    index.add("a", "piano lesson scales")
+    index.add("b", "guitar lesson chords")
+    index.add("c", "tax return deadline")
+    index.save(tmp_path / "alice")
+
+    loaded = RelatedIndex.load(tmp_path / "alice")
+    assert len(loaded) == 3
+    assert loaded.similar("a", k=1) == index.similar("a", k=1)
+
+    loaded.add("d", "piano recital")
+    assert "d" in loaded